@@ -199,51 +199,39 @@ def calculate_cluster_metrics(df, cluster_col='cluster', use_road_distance=False
     return metrics
 
 
-def cluster_unidade_local(df_ul, unidade_name, max_cluster_size):
+def cluster_unidade_local(features, unidade_name, max_cluster_size):
     """
     Cluster points within a single Unidade Local
     
     Args:
-        df_ul: DataFrame with points from one Unidade Local
+        features: (n, 3) float array view with lat, lon and cost for the points
+            of one Unidade Local. The cost column is normalized in place.
         unidade_name: Name of the Unidade Local
         max_cluster_size: Maximum number of points per cluster
     
     Returns:
-        DataFrame with 'cluster' column added
+        Array with the local cluster label of each point
     """
     print(f"\n{'='*70}")
     print(f"Processing: {unidade_name}")
     print(f"{'='*70}")
-    print(f"Total points: {len(df_ul)}")
+    print(f"Total points: {len(features)}")
 
-    if len(df_ul) == 0:
-        return df_ul
+    if len(features) == 0:
+        return np.empty(0, dtype=np.int64)
 
-    n_clusters = max(1, int(np.ceil(len(df_ul) / max_cluster_size)))
+    n_clusters = max(1, int(np.ceil(len(features) / max_cluster_size)))
     print(f"Creating {n_clusters} cluster(s) (max {max_cluster_size} points each)")
 
-    coords = df_ul[['LAT', 'LONG']].values
-
     if n_clusters == 1:
-        df_ul['cluster'] = 0
-        return df_ul
+        return np.zeros(len(features), dtype=np.int64)
 
     print("Initial geographic clustering...")
     # Normalize cost to similar scale as coordinates
-    cost_normalized = df_ul['Custo final'] / df_ul['Custo final'].max()
-
-    # Create feature matrix with lat, lon, AND normalized cost
-    features = np.column_stack([
-        coords,  # lat, lon
-        cost_normalized * 1  # weighted cost
-    ])
+    features[:, 2] /= features[:, 2].max()
 
     kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    clusters = kmeans.fit_predict(features)
-
-    df_ul['cluster'] = clusters
-
-    return df_ul
+    return kmeans.fit_predict(features)
 
 
 def perform_clustering(df_merged, analysed_state, max_cluster_size, nota_minima, nota_maxima, progress_callback=None):
@@ -267,7 +255,7 @@ def perform_clustering(df_merged, analysed_state, max_cluster_size, nota_minima,
     nota_minima = pd.to_numeric(nota_minima, errors='coerce')
     nota_maxima = pd.to_numeric(nota_maxima, errors='coerce')
     
-    df_filtered = df_merged[
+    mask = (
         (df_merged['UF'] == analysed_state) &
         (df_merged['NOTA CONSOLIDADA'] >= nota_minima) &
         (df_merged['NOTA CONSOLIDADA'] <= nota_maxima) &
@@ -275,30 +263,47 @@ def perform_clustering(df_merged, analysed_state, max_cluster_size, nota_minima,
         (pd.notna(df_merged['Longitude'])) &
         (pd.notna(df_merged['Unidade Local'])) &
         (pd.notna(df_merged['Custo final']))
-    ].copy()
+    ).to_numpy()
+    rows = np.flatnonzero(mask)
 
-    df_filtered['LAT'] = df_filtered['Latitude']
-    df_filtered['LONG'] = df_filtered['Longitude']
+    # Single stable sort by Unidade Local: each one becomes a contiguous range
+    codes, unidades_locais = pd.factorize(
+        df_merged['Unidade Local'].to_numpy()[rows], sort=True
+    )
+    order = np.argsort(codes, kind='stable')
+    rows = rows[order]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(unidades_locais)))))
+
+    # One contiguous feature array (lat, lon, cost) shared by all Unidades Locais
+    features = np.empty((len(rows), 3), dtype=np.float64)
+    features[:, 0] = df_merged['Latitude'].to_numpy()[rows]
+    features[:, 1] = df_merged['Longitude'].to_numpy()[rows]
+    features[:, 2] = df_merged['Custo final'].to_numpy()[rows]
     
     if progress_callback:
         progress_callback(70)
 
     # Process each Unidade Local
-    unidades_locais = df_filtered['Unidade Local'].unique()
+    clusters = np.empty(len(rows), dtype=np.int64)
+    cluster_labels = []
     global_cluster_id = 0
-    result_dfs = []
-
-    for unidade in sorted(unidades_locais):
-        df_ul = df_filtered[df_filtered['Unidade Local'] == unidade].copy()
-        df_ul = cluster_unidade_local(df_ul, unidade, max_cluster_size)
-        df_ul['cluster'] = df_ul['cluster'] + global_cluster_id
-        global_cluster_id = df_ul['cluster'].max() + 1
-        df_ul['cluster_label'] = df_ul.apply(
-            lambda row: f"{row['Unidade Local']}-C{row['cluster']}", axis=1
-        )
-        result_dfs.append(df_ul)
 
-    df_final = pd.concat(result_dfs, ignore_index=True)
+    for i, unidade in enumerate(unidades_locais):
+        start, stop = bounds[i], bounds[i + 1]
+        local = cluster_unidade_local(features[start:stop], unidade, max_cluster_size)
+        clusters[start:stop] = local + global_cluster_id
+        n_local = int(local.max()) + 1
+        cluster_labels.extend(
+            f"{unidade}-C{global_cluster_id + c}" for c in range(n_local)
+        )
+        global_cluster_id += n_local
+
+    df_final = df_merged.take(rows)
+    df_final.index = pd.RangeIndex(len(df_final))
+    df_final['LAT'] = df_final['Latitude']
+    df_final['LONG'] = df_final['Longitude']
+    df_final['cluster'] = clusters
+    df_final['cluster_label'] = np.asarray(cluster_labels, dtype=object)[clusters]
     
     if progress_callback:
         progress_callback(80)